@@ -0,0 +1,102 @@
+import os
+
+CONTEXT_LENGTH_DIMENSION = 'context_length'
+NAME_LENGTH_DIMENSION = 'name_length'
+RETURN_TYPE_DIMENSION = 'return_type'
+PROJECT_DIMENSION = 'project'
+DIMENSIONS = (
+    CONTEXT_LENGTH_DIMENSION, NAME_LENGTH_DIMENSION, RETURN_TYPE_DIMENSION,
+    PROJECT_DIMENSION)
+
+CONTEXT_LENGTH_LABELS = ['1 - 10', '11 - 20', '21 - 30', '30+']
+NAME_LENGTH_LABELS = ['1', '2', '3', '4', '5+']
+
+
+def get_context_length_bucket(context_len):
+    """Gets the bucket id of a number of context tokens.
+
+    Args:
+        context_len: Total number of tokens in the contexts of a method
+
+    Returns:
+        Index of the bucket in CONTEXT_LENGTH_LABELS
+    """
+    if context_len <= 10:
+        return 0
+    elif context_len <= 20:
+        return 1
+    elif context_len <= 30:
+        return 2
+    else:
+        return 3
+
+
+def get_name_length_bucket(name_len):
+    """Gets the bucket id of a number of method name tokens.
+
+    Args:
+        name_len: Number of tokens in the name of a method
+
+    Returns:
+        Index of the bucket in NAME_LENGTH_LABELS
+    """
+    return min(max(name_len, 1), len(NAME_LENGTH_LABELS)) - 1
+
+
+def write_bucket_labels(labels_dir_path, dimension, labels):
+    """Writes the labels of the buckets of a dimension, one per line.
+
+    The bucket id of each label is its line number.
+
+    Args:
+        labels_dir_path: Path to the directory of bucket label files
+        dimension: Name of the dimension (see DIMENSIONS)
+        labels: List of bucket labels, indexed by bucket id
+    """
+    os.makedirs(labels_dir_path, exist_ok=True)
+    labels_file_path = os.path.join(labels_dir_path, f'{dimension}.txt')
+
+    with open(labels_file_path, 'w') as labels_file:
+        for label in labels:
+            labels_file.write(label)
+            labels_file.write('\n')
+
+
+def read_bucket_labels(labels_dir_path, dimension):
+    """Reads the labels of the buckets of a dimension.
+
+    Args:
+        labels_dir_path: Path to the directory of bucket label files
+        dimension: Name of the dimension (see DIMENSIONS)
+
+    Returns:
+        List of bucket labels, indexed by bucket id
+    """
+    labels_file_path = os.path.join(labels_dir_path, f'{dimension}.txt')
+
+    with open(labels_file_path) as labels_file:
+        return [line.rstrip('\n') for line in labels_file]
+
+
+def read_bucket_ids(buckets_file_path, dimensions):
+    """Reads the bucket ids of each method from a bucket file.
+
+    The first line of a bucket file names its dimensions, and each following
+    line contains the tab-separated bucket ids of one method.
+
+    Args:
+        buckets_file_path: Path to the bucket file
+        dimensions: Names of the dimensions to read
+
+    Yields:
+        Tuples of the bucket ids of each method, in the order of dimensions
+    """
+    with open(buckets_file_path) as buckets_file:
+        file_dimensions = buckets_file.readline().split()
+        columns = [
+            file_dimensions.index(dimension) for dimension in dimensions]
+
+        for line in buckets_file:
+            bucket_ids = line.split('\t')
+            yield tuple([int(bucket_ids[column]) for column in columns])
+
@@ -0,0 +1,469 @@
+import itertools
+import math
+import numpy as np
+
+# Positions of the running totals in the list of totals of a bucket. Besides
+# the metric totals, the clipped n-gram matches, n-gram counts and lengths
+# used by corpus BLEU are totaled, so BLEU needs no per-example state.
+N_TOTAL = 0
+EXACT_MATCH_TOTAL = 1
+PRECISION_TOTAL = 2
+RECALL_TOTAL = 3
+EDIT_DISTANCE_TOTAL = 4
+BLEU_UNIGRAM_MATCHES_TOTAL = 5
+BLEU_UNIGRAMS_TOTAL = 6
+BLEU_BIGRAM_MATCHES_TOTAL = 7
+BLEU_BIGRAMS_TOTAL = 8
+PRED_LENGTH_TOTAL = 9
+TARGET_LENGTH_TOTAL = 10
+N_TOTALS = 11
+
+# Positions of the totals that are counts rather than sums of fractions
+COUNT_TOTALS = (
+    N_TOTAL, EXACT_MATCH_TOTAL, BLEU_UNIGRAM_MATCHES_TOTAL,
+    BLEU_UNIGRAMS_TOTAL, BLEU_BIGRAM_MATCHES_TOTAL, BLEU_BIGRAMS_TOTAL,
+    PRED_LENGTH_TOTAL, TARGET_LENGTH_TOTAL)
+
+# Longest names (in tokens, and in characters once joined) whose totals are
+# computed by compute_pair_totals in bulk; the totals of longer names are
+# computed one pair at a time by compute_example_totals. The character limit
+# is the number of bits in the integers holding the edit distance columns.
+MAX_BULK_TOKENS = 16
+MAX_BULK_CHARS = 64
+
+# Number of pairs whose totals are computed together by compute_pair_totals
+PAIR_CHUNK_SIZE = 2 ** 15
+
+
+def compute_pair_totals(targets, preds):
+    """Computes the totals of many (target, predicted name) pairs at once.
+
+    The pairs are sorted by length and processed in chunks of similar
+    lengths, with the tokens and characters of each chunk held in arrays, so
+    each metric is computed for the whole chunk with a few array operations
+    per token or character position. The edit distance uses the same
+    bit-parallel algorithm as levenshtein, with one 64-bit integer per pair.
+    The totals are the same as those of compute_example_totals.
+
+    Args:
+        targets: Sequence of target method names
+        preds: Sequence of predicted method names, in the order of targets
+
+    Returns:
+        Array of the totals of each pair, with one row per pair and one
+        column per position of the totals
+    """
+    n_pairs = len(targets)
+    pair_totals = np.zeros((n_pairs, N_TOTALS))
+
+    # Give every distinct name an id, so that each name is only split once
+    name_ids = {
+        name: i for i, name in enumerate(dict.fromkeys(
+            itertools.chain(targets, preds)))}
+    target_name_ids = np.fromiter(
+        map(name_ids.__getitem__, targets), dtype=np.intp, count=n_pairs)
+    pred_name_ids = np.fromiter(
+        map(name_ids.__getitem__, preds), dtype=np.intp, count=n_pairs)
+
+    names = [name.split() for name in name_ids]
+    joined_names = [''.join(tokens) for tokens in names]
+
+    token_lens = np.array([len(tokens) for tokens in names], dtype=np.intp)
+    char_lens = np.array([len(name) for name in joined_names], dtype=np.intp)
+
+    # Token ids of each name, padded with -1
+    is_bulk_name = token_lens <= MAX_BULK_TOKENS
+    bulk_tokens = [
+        token for tokens, is_bulk in zip(names, is_bulk_name) if is_bulk
+        for token in tokens]
+    token_ids = {
+        token: i for i, token in enumerate(dict.fromkeys(bulk_tokens))}
+    name_tokens = np.full((len(names), MAX_BULK_TOKENS), -1, dtype=np.int64)
+    bulk_token_lens = token_lens[is_bulk_name]
+    name_tokens[
+        np.repeat(np.flatnonzero(is_bulk_name), bulk_token_lens),
+        np.arange(len(bulk_tokens))
+        - np.repeat(np.cumsum(bulk_token_lens) - bulk_token_lens,
+                    bulk_token_lens)] = np.fromiter(
+            map(token_ids.__getitem__, bulk_tokens), dtype=np.int64,
+            count=len(bulk_tokens))
+
+    # Characters of each name as code points, padded with 0
+    name_chars = np.array(
+        [name if len(name) <= MAX_BULK_CHARS else '' for name in joined_names],
+        dtype=f'<U{MAX_BULK_CHARS}').view(np.uint32).reshape(
+            len(joined_names), MAX_BULK_CHARS)
+
+    is_bulk = (
+        (token_lens[target_name_ids] <= MAX_BULK_TOKENS)
+        & (token_lens[pred_name_ids] <= MAX_BULK_TOKENS)
+        & (char_lens[target_name_ids] <= MAX_BULK_CHARS)
+        & (char_lens[pred_name_ids] <= MAX_BULK_CHARS))
+
+    # Sort the pairs by length, so the pairs of a chunk have similar lengths
+    bulk_pairs = np.flatnonzero(is_bulk)
+    pair_lens = np.maximum(
+        char_lens[target_name_ids], char_lens[pred_name_ids])[bulk_pairs]
+    bulk_pairs = bulk_pairs[np.argsort(pair_lens, kind='stable')]
+
+    for chunk_start in range(0, len(bulk_pairs), PAIR_CHUNK_SIZE):
+        chunk = bulk_pairs[chunk_start:chunk_start + PAIR_CHUNK_SIZE]
+        target_ids = target_name_ids[chunk]
+        pred_ids = pred_name_ids[chunk]
+
+        add_token_totals(
+            pair_totals, chunk, name_tokens, len(token_ids), token_lens,
+            target_ids, pred_ids)
+        add_edit_distance_totals(
+            pair_totals, chunk, name_chars, char_lens, target_ids, pred_ids)
+
+    for i in np.flatnonzero(~is_bulk):
+        pair_totals[i] = compute_example_totals(targets[i], preds[i])
+
+    return pair_totals
+
+
+def add_token_totals(
+        pair_totals, chunk, name_tokens, n_token_ids, token_lens, target_ids,
+        pred_ids):
+    """Fills in the totals of a chunk of pairs that are computed over tokens.
+
+    Args:
+        pair_totals: Array of the totals of each pair, updated in place
+        chunk: Array of the indexes of the pairs of the chunk
+        name_tokens: Array of the token ids of each name, padded with -1
+        n_token_ids: Number of distinct token ids
+        token_lens: Array of the number of tokens in each name
+        target_ids: Array of the name ids of the targets of the chunk
+        pred_ids: Array of the name ids of the predictions of the chunk
+    """
+    target_lens = token_lens[target_ids]
+    pred_lens = token_lens[pred_ids]
+    width = max(target_lens.max(), pred_lens.max(), 1)
+
+    target_tokens = name_tokens[target_ids, :width]
+    pred_tokens = name_tokens[pred_ids, :width]
+
+    # Number of target tokens in the prediction and the other way around,
+    # with the padding of each side never matching a token of the other
+    pred_in_target = np.zeros(len(chunk), dtype=np.int64)
+    target_in_pred = np.zeros(len(chunk), dtype=np.int64)
+    for j in range(width):
+        pred_in_target += (
+            target_tokens == pred_tokens[:, j, None]).any(axis=1) \
+            & (j < pred_lens)
+        target_in_pred += (
+            pred_tokens == target_tokens[:, j, None]).any(axis=1) \
+            & (j < target_lens)
+
+    # Bigram ids, with -1 for the bigrams that run into the padding
+    target_bigrams = np.where(
+        target_tokens[:, 1:] >= 0,
+        target_tokens[:, :-1] * n_token_ids + target_tokens[:, 1:], -1)
+    pred_bigrams = np.where(
+        pred_tokens[:, 1:] >= 0,
+        pred_tokens[:, :-1] * n_token_ids + pred_tokens[:, 1:], -1)
+
+    pair_totals[chunk, N_TOTAL] = 1
+    pair_totals[chunk, EXACT_MATCH_TOTAL] = target_ids == pred_ids
+    pair_totals[chunk, PRECISION_TOTAL] = np.where(
+        pred_lens > 0, pred_in_target / np.maximum(pred_lens, 1), 1)
+    pair_totals[chunk, RECALL_TOTAL] = np.where(
+        target_lens > 0, target_in_pred / np.maximum(target_lens, 1), 1)
+    pair_totals[chunk, BLEU_UNIGRAM_MATCHES_TOTAL] = \
+        count_bulk_clipped_matches(target_tokens, pred_tokens, pred_lens)
+    pair_totals[chunk, BLEU_UNIGRAMS_TOTAL] = np.maximum(pred_lens, 1)
+    pair_totals[chunk, BLEU_BIGRAM_MATCHES_TOTAL] = \
+        count_bulk_clipped_matches(target_bigrams, pred_bigrams, pred_lens - 1)
+    pair_totals[chunk, BLEU_BIGRAMS_TOTAL] = np.maximum(pred_lens - 1, 1)
+    pair_totals[chunk, PRED_LENGTH_TOTAL] = pred_lens
+    pair_totals[chunk, TARGET_LENGTH_TOTAL] = target_lens
+
+
+def count_bulk_clipped_matches(target_ngrams, pred_ngrams, pred_lens):
+    """Counts the clipped n-gram matches of many pairs at once.
+
+    The k-th occurrence of an n-gram in a prediction is a match if the
+    n-gram occurs at least k times in the target, so each n-gram matches as
+    many times as the smaller of its counts, as in count_clipped_matches.
+
+    Args:
+        target_ngrams: Array of the target n-gram ids of each pair, padded
+            with negative ids
+        pred_ngrams: Array of the predicted n-gram ids of each pair
+        pred_lens: Array of the number of predicted n-grams of each pair
+
+    Returns:
+        Array of the number of clipped n-gram matches of each pair
+    """
+    counts = np.zeros(len(pred_ngrams), dtype=np.int64)
+
+    for j in range(pred_ngrams.shape[1]):
+        pred_ngram = pred_ngrams[:, j, None]
+        # Number of earlier occurrences of the n-gram in the prediction
+        rank = (pred_ngrams[:, :j] == pred_ngram).sum(axis=1)
+        target_count = (target_ngrams == pred_ngram).sum(axis=1)
+        counts += (rank < target_count) & (j < pred_lens)
+
+    return counts
+
+
+def add_edit_distance_totals(
+        pair_totals, chunk, name_chars, char_lens, target_ids, pred_ids):
+    """Fills in the edit distance totals of a chunk of pairs.
+
+    Runs levenshtein's bit-parallel algorithm on every pair of the chunk at
+    once, with the columns of each pair held in the bits of one unsigned
+    64-bit integer. The pairs whose shorter name has run out of characters
+    keep their distance.
+
+    Args:
+        pair_totals: Array of the totals of each pair, updated in place
+        chunk: Array of the indexes of the pairs of the chunk
+        name_chars: Array of the characters of each joined name, as code
+            points padded with 0
+        char_lens: Array of the number of characters in each joined name
+        target_ids: Array of the name ids of the targets of the chunk
+        pred_ids: Array of the name ids of the predictions of the chunk
+    """
+    target_lens = char_lens[target_ids]
+    pred_lens = char_lens[pred_ids]
+
+    # Run over the characters of the shorter name of each pair
+    is_target_longer = (target_lens >= pred_lens)[:, None]
+    long_chars = np.where(
+        is_target_longer, name_chars[target_ids], name_chars[pred_ids])
+    short_chars = np.where(
+        is_target_longer, name_chars[pred_ids], name_chars[target_ids])
+    long_lens = np.maximum(target_lens, pred_lens)
+    short_lens = np.minimum(target_lens, pred_lens)
+
+    long_width = long_lens.max()
+    short_width = short_lens.max()
+
+    one = np.uint64(1)
+    # Bit masks of the positions of each short character in the long name
+    position_masks = np.zeros((len(chunk), short_width), dtype=np.uint64)
+    for i in range(long_width):
+        position_masks |= (
+            long_chars[:, i, None] == short_chars[:, :short_width]
+        ).astype(np.uint64) << np.uint64(i)
+
+    # Shift in two steps, since shifting by 64 bits is undefined
+    last_bits = (one << np.maximum(long_lens - 1, 0).astype(np.uint64))
+    masks = ((last_bits - one) << one) | one
+    position_masks &= masks[:, None]
+
+    positive_vertical = masks.copy()
+    negative_vertical = np.zeros(len(chunk), dtype=np.uint64)
+    distances = long_lens.astype(np.int64)
+
+    for j in range(short_width):
+        eq = position_masks[:, j]
+        x_vertical = eq | negative_vertical
+        x_horizontal = (
+            ((eq & positive_vertical) + positive_vertical)
+            ^ positive_vertical) | eq
+        positive_horizontal = \
+            negative_vertical | ~(x_horizontal | positive_vertical)
+        negative_horizontal = positive_vertical & x_horizontal
+
+        is_active = j < short_lens
+        distances += (
+            (positive_horizontal & last_bits) != 0) & is_active
+        distances -= (
+            (negative_horizontal & last_bits) != 0) & is_active
+
+        positive_horizontal = (positive_horizontal << one) | one
+        negative_horizontal <<= one
+        positive_vertical = (
+            negative_horizontal | ~(x_vertical | positive_horizontal)) & masks
+        negative_vertical = positive_horizontal & x_vertical
+
+    # The distance is 0 when the names are equal, including when both are
+    # empty
+    pair_totals[chunk, EDIT_DISTANCE_TOTAL] = \
+        distances / np.maximum(long_lens, 1)
+
+
+def compute_example_totals(target, pred):
+    """Computes the totals of one example, to be added to the running totals.
+
+    Args:
+        target: Target method name
+        pred: Predicted method name
+
+    Returns:
+        Tuple of the totals, in the order of the positions of the totals
+    """
+    target_tokens = target.split()
+    pred_tokens = pred.split()
+
+    target_bigrams = list(zip(target_tokens, target_tokens[1:]))
+    pred_bigrams = list(zip(pred_tokens, pred_tokens[1:]))
+
+    return (
+        1,
+        target == pred,
+        compute_precision(target_tokens, pred_tokens),
+        compute_recall(target_tokens, pred_tokens),
+        compute_edit_distance(''.join(target_tokens), ''.join(pred_tokens)),
+        count_clipped_matches(target_tokens, pred_tokens),
+        max(len(pred_tokens), 1),
+        count_clipped_matches(target_bigrams, pred_bigrams),
+        max(len(pred_bigrams), 1),
+        len(pred_tokens),
+        len(target_tokens),
+    )
+
+
+def compute_bleu(totals):
+    """Computes the corpus BLEU score with unigrams and bigrams from totals.
+
+    This matches nltk's corpus_bleu with weights (0.5, 0.5), a single
+    reference per example and no smoothing, except that a corpus without
+    any bigram match scores 0 rather than a vanishingly small number.
+
+    Args:
+        totals: List of metric totals, as computed by compute_report
+
+    Returns:
+        Corpus BLEU score
+    """
+    unigram_matches = totals[BLEU_UNIGRAM_MATCHES_TOTAL]
+    bigram_matches = totals[BLEU_BIGRAM_MATCHES_TOTAL]
+
+    if not unigram_matches or not bigram_matches:
+        return 0
+
+    log_precision = 0.5 * (
+        math.log(unigram_matches / totals[BLEU_UNIGRAMS_TOTAL])
+        + math.log(bigram_matches / totals[BLEU_BIGRAMS_TOTAL]))
+
+    pred_len = totals[PRED_LENGTH_TOTAL]
+    target_len = totals[TARGET_LENGTH_TOTAL]
+
+    if pred_len > target_len:
+        brevity_penalty = 1
+    else:
+        brevity_penalty = math.exp(1 - target_len / pred_len)
+
+    return brevity_penalty * math.exp(log_precision)
+
+
+def count_clipped_matches(target_ngrams, pred_ngrams):
+    """Counts the predicted n-grams in the target, clipped by target counts.
+
+    Args:
+        target_ngrams: List of target n-grams
+        pred_ngrams: List of predicted n-grams
+
+    Returns:
+        Number of clipped n-gram matches
+    """
+    unmatched_ngrams = list(target_ngrams)
+    count = 0
+    for pred_ngram in pred_ngrams:
+        if pred_ngram in unmatched_ngrams:
+            unmatched_ngrams.remove(pred_ngram)
+            count += 1
+    return count
+
+
+def compute_precision(target_tokens, pred_tokens):
+    if not pred_tokens:
+        return 1
+    count = 0
+    for pred_token in pred_tokens:
+        if pred_token in target_tokens:
+            count += 1
+    return count / len(pred_tokens)
+
+
+def compute_recall(target_tokens, pred_tokens):
+    if not target_tokens:
+        return 1
+    count = 0
+    for target_token in target_tokens:
+        if target_token in pred_tokens:
+            count += 1
+    return count / len(target_tokens)
+
+
+def compute_f_score(precision, recall):
+    if precision + recall == 0:
+        return 0
+    return 2 * precision * recall / (precision + recall)
+
+
+def compute_edit_distance(target, pred):
+    if target == pred:
+        return 0
+    return levenshtein(target, pred) / max(len(target), len(pred))
+
+
+def levenshtein(a, b):
+    """Computes the Levenshtein distance between two strings.
+
+    After stripping the common prefix and suffix, uses the bit-parallel
+    algorithm of Myers (1999) in the formulation of Hyyrö (2001), with each
+    column of the dynamic programming matrix held in the bits of an integer,
+    so it takes one pass over the shorter string.
+
+    Args:
+        a: First string
+        b: Second string
+
+    Returns:
+        Minimum number of insertions, deletions and substitutions turning a
+        into b
+    """
+    if len(a) < len(b):
+        a, b = b, a
+
+    # Strip the common prefix and suffix, which do not change the distance
+    start = 0
+    while start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+
+    if not b:
+        return len(a)
+
+    # Bit masks of the positions of each character in a
+    position_masks = {}
+    for i, char in enumerate(a):
+        position_masks[char] = position_masks.get(char, 0) | (1 << i)
+
+    mask = (1 << len(a)) - 1
+    last_bit = 1 << (len(a) - 1)
+    positive_vertical = mask
+    negative_vertical = 0
+    distance = len(a)
+
+    for char in b:
+        eq = position_masks.get(char, 0)
+        x_vertical = eq | negative_vertical
+        x_horizontal = (
+            ((eq & positive_vertical) + positive_vertical)
+            ^ positive_vertical) | eq
+        positive_horizontal = \
+            negative_vertical | ~(x_horizontal | positive_vertical)
+        negative_horizontal = positive_vertical & x_horizontal
+
+        if positive_horizontal & last_bit:
+            distance += 1
+        elif negative_horizontal & last_bit:
+            distance -= 1
+
+        positive_horizontal = (positive_horizontal << 1) | 1
+        negative_horizontal <<= 1
+        positive_vertical = (
+            negative_horizontal | ~(x_vertical | positive_horizontal)) & mask
+        negative_vertical = positive_horizontal & x_vertical
+
+    return distance
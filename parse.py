@@ -2,16 +2,7 @@ import javalang
 import re
 import os
 import sys
-
-NAME = 'name'
-DOCUMENTATION = 'documentation'
-ENCLOSING_CLASSES = 'enclosing_classes'
-INPUT_PARAMETERS = 'input_parameters'
-RETURN_TYPE = 'return_type'
-BODY = 'body'
-METHOD_NAME_95P = 5.0
-ALL_TOKENS_95P = 66.0
-
+from store import *
 
 
 def gather_source_file_paths(dataset_dir_path):
@@ -51,22 +42,12 @@ def parse_and_write_source_files(
             methods = parse_source_file(source_file_path)
             
             for method in methods:
-                all_token_len = len(re.findall(r'\w+', method[DOCUMENTATION]+' '+method[ENCLOSING_CLASSES]+' '+method[INPUT_PARAMETERS]+' '+method[RETURN_TYPE]+' '+method[BODY]))
-                name_len = len(re.findall(r'\w+', method[NAME]))
-                
+                all_token_len = sum(
+                    count_tokens(method[context]) for context in CONTEXTS)
+                name_len = count_tokens(method[NAME])
+
                 if name_len <= METHOD_NAME_95P and all_token_len <= ALL_TOKENS_95P:
-                    output_file.write(method[NAME])
-                    output_file.write('\n')
-                    output_file.write(method[DOCUMENTATION])
-                    output_file.write('\n')
-                    output_file.write(method[ENCLOSING_CLASSES])
-                    output_file.write('\n')
-                    output_file.write(method[INPUT_PARAMETERS])
-                    output_file.write('\n')
-                    output_file.write(method[RETURN_TYPE])
-                    output_file.write('\n')
-                    output_file.write(method[BODY])
-                    output_file.write('\n')
+                    write_method(output_file, method)
 
             n_methods += len(methods)
 
@@ -82,6 +63,111 @@ def parse_and_write_source_files(
         f'{n_methods} methods processed')
 
 
+def parse_and_write_store(
+        source_file_paths, dataset_dir_path, store_file_path, meta_file_path,
+        verbose=True, process_id=0):
+    """Parses a list of source files into a shared store of methods.
+
+    Unlike parse_and_write_source_files, no methods are filtered out. Every
+    method is written to the store in the six-line text format, and a
+    corresponding line is written to the metadata file containing the split
+    and project of the method (taken from the code2seq directory layout), its
+    return type, and the token counts of the name and of each context. Views
+    of the store and their bucket ids are built from the metadata file alone
+    (see views.py).
+
+    Args:
+        source_file_paths: List of source file paths
+        dataset_dir_path: Path to root directory of dataset, which contains
+            the training, validation and test directories
+        store_file_path: Path to the output store file
+        meta_file_path: Path to the output metadata file
+        verbose: Whether to print update messages to the console
+    """
+    n_files = len(source_file_paths)
+    n_methods = 0
+
+    with open(store_file_path, 'w') as store_file, \
+            open(meta_file_path, 'w') as meta_file:
+
+        for i, source_file_path in enumerate(source_file_paths):
+            methods = parse_source_file(source_file_path)
+            split, project = get_split_and_project(
+                source_file_path, dataset_dir_path)
+
+            for method in methods:
+                write_method(store_file, method)
+
+                token_lens = [
+                    str(count_tokens(method[field])) for field in FIELDS]
+                meta_file.write('\t'.join(
+                    [split, project, method[RETURN_TYPE]] + token_lens))
+                meta_file.write('\n')
+
+            n_methods += len(methods)
+
+            if verbose and (i + 1) % 1000 == 0:
+                print(
+                    f'Process {process_id}:',
+                    f'Completed {i + 1} / {n_files} files',
+                    f'(~{(i + 1) / n_files * 100:.1f}%),',
+                    f'{n_methods} methods processed')
+
+    print(
+        f'Process {process_id}: Completed {n_files} files,',
+        f'{n_methods} methods processed')
+
+
+def write_method(output_file, method):
+    """Writes a method to a text file as six lines, one line per field.
+
+    The name is written first, followed by each context in the order of
+    CONTEXTS.
+
+    Args:
+        output_file: Text file opened for writing
+        method: Dictionary containing the contexts of the method
+    """
+    for field in FIELDS:
+        output_file.write(method[field])
+        output_file.write('\n')
+
+
+def count_tokens(text):
+    """Counts the word tokens in a string of space-separated tokens.
+
+    Args:
+        text: String of tokens
+
+    Returns:
+        Number of word tokens in the string
+    """
+    return len(re.findall(r'\w+', text))
+
+
+def get_split_and_project(source_file_path, dataset_dir_path):
+    """Gets the dataset split and project of a source file from its path.
+
+    The code2seq datasets are laid out as <split>/<project>/.../<file>.java,
+    where the split directory is one of "training", "validation" or "test".
+
+    Args:
+        source_file_path: Path to the source file
+        dataset_dir_path: Path to root directory of dataset
+
+    Returns:
+        Tuple of the split name (see SPLITS) and the project name, either of
+        which is an empty string if the path is too shallow
+    """
+    relative_path = os.path.relpath(source_file_path, dataset_dir_path)
+    dir_names = os.path.normpath(relative_path).split(os.sep)[:-1]
+
+    split = SPLITS.get(dir_names[0], dir_names[0]) if dir_names else ''
+    project = dir_names[1] if len(dir_names) > 1 else ''
+
+    return split, project
+
+
 def parse_source_file(source_file_path):
     """Parses a .java source file, extracting relevant contexts.
 
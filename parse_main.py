@@ -2,12 +2,54 @@ import math
 import os
 from multiprocessing import Process
 from parse import *
+from store import *
+from views import *
 
 
 def parse_main(dataset_dir_path, output_file_path, n_processes):
     # List of paths to every source file
     source_file_paths = gather_source_file_paths(dataset_dir_path)
 
+    run_processes(
+        parse_and_write_source_files, (), source_file_paths,
+        [output_file_path], n_processes)
+
+
+def parse_views_main(dataset_dir_path, output_dir_path, views, n_processes):
+    # List of paths to every source file
+    source_file_paths = gather_source_file_paths(dataset_dir_path)
+
+    os.makedirs(output_dir_path, exist_ok=True)
+    store_file_path = os.path.join(output_dir_path, STORE_FILE_NAME)
+    meta_file_path = os.path.join(output_dir_path, META_FILE_NAME)
+
+    run_processes(
+        parse_and_write_store, (dataset_dir_path,), source_file_paths,
+        [store_file_path, meta_file_path], n_processes)
+
+    # Index every view (and split) from the metadata of the single parse
+    write_view_indexes(output_dir_path, views)
+
+
+def run_processes(
+        target, args, source_file_paths, output_file_paths, n_processes):
+    """Splits source files into blocks and parses each block in a Process.
+
+    Each Process writes to its own temporary copy of every output file, named
+    after the output file so that different outputs never share temporary
+    files. The temporary files are then concatenated into the output files
+    in block order, so the output follows the order of the source files.
+
+    Args:
+        target: Function run by each Process, called with the block of
+            source file paths, args, the temporary output file paths, the
+            verbose flag and the process index
+        args: Tuple of extra arguments passed to target after the source
+            file paths
+        source_file_paths: List of source file paths
+        output_file_paths: List of paths to the output files
+        n_processes: Number of processes to run
+    """
     # Number of source files that each Process will parse and write
     block_size = math.ceil(len(source_file_paths) / n_processes)
 
@@ -20,39 +62,56 @@ def parse_main(dataset_dir_path, output_file_path, n_processes):
         block_end = min((i + 1) * block_size, len(source_file_paths))
         block_source_file_paths = source_file_paths[block_start:block_end]
 
-        # Temporary output file for this process
-        block_output_file_path = f'./temp_{i}.txt'
+        # Temporary output files for this process
+        block_output_file_paths = [
+            f'{output_file_path}.temp_{i}'
+            for output_file_path in output_file_paths]
 
         # Create and start the Process
         p = Process(
-            target=parse_and_write_source_files,
-            args=(block_source_file_paths, block_output_file_path, True, i,))
+            target=target,
+            args=(
+                block_source_file_paths, *args, *block_output_file_paths,
+                True, i,))
         p.start()
 
         # Keep track of the Process to join later
         processes[i] = p
 
-    # Create a single output file to consolidate all Process results
-    with open(output_file_path, 'w') as output_file:
+    # Consolidate all Process results into the output files
+    output_files = [
+        open(output_file_path, 'w') for output_file_path in output_file_paths]
+
+    try:
         for i in range(n_processes):
             # Wait until this process has finished parsing and writing
             p = processes[i]
             p.join()
-            
-            # Copy the results of the Process to main output file
-            block_output_file_path = f'./temp_{i}.txt'
-            with open(block_output_file_path) as block_output_file:
-                block_output = block_output_file.read()
-                output_file.write(block_output)
 
-            # Delete the temporary output file for the Process
-            os.remove(block_output_file_path)
+            for output_file in output_files:
+                # Copy the results of the Process to the output file
+                block_output_file_path = f'{output_file.name}.temp_{i}'
+                with open(block_output_file_path) as block_output_file:
+                    block_output = block_output_file.read()
+                    output_file.write(block_output)
+
+                # Delete the temporary output file for the Process
+                os.remove(block_output_file_path)
+    finally:
+        for output_file in output_files:
+            output_file.close()
 
 
 if __name__ == '__main__':
 
     dataset_dir_path = '../data/code2seq/java-small'
-    output_file_path = '../data.txt'
+    output_dir_path = '../data'
+    views = make_ablation_views()
     n_processes = 12
 
-    parse_main(dataset_dir_path, output_file_path, n_processes)
+    parse_views_main(dataset_dir_path, output_dir_path, views, n_processes)
+
+    # Export each split of the view with every context in the six-line format
+    for split in SPLITS.values():
+        output_file_path = os.path.join(output_dir_path, f'all_{split}.txt')
+        write_view_split(output_dir_path, 'all', split, output_file_path)
@@ -1,103 +1,104 @@
-import sys
-from nltk.metrics import distance
-from nltk.translate import bleu_score
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-
-def main(experiment_name):
+import argparse
+import itertools
+import os
+from array import array
+import numpy as np
+from buckets import *
+from metrics import *
+from store import *
+
+# Maximum number of buckets (the largest ones) drawn in a plot
+MAX_PLOT_BUCKETS = 20
+
+
+def main(
+        experiment_name, data_dir_path='../data', view_name=None,
+        split='test', dimensions=(CONTEXT_LENGTH_DIMENSION,),
+        plot_dir_path=None):
+    """Computes and prints the metrics of an experiment, overall and by bucket.
+
+    The predictions are assumed to be in the same order as the examples of
+    the view split that was fed to the model, and there must be exactly one
+    prediction per example. When no view is given, only the
+    context length dimension is available, and it is computed from the source
+    line of each prediction instead of being read from a bucket file.
+
+    Args:
+        experiment_name: Name of the results directory of the experiment
+        data_dir_path: Path to the directory containing the store and views
+        view_name: Name of the view the experiment was run on
+        split: Name of the dataset split the predictions were made on
+        dimensions: Names of the bucket dimensions to report (see DIMENSIONS)
+        plot_dir_path: Path to the directory to save plots to, if any
+    """
     results_dir_path = f'../results/{experiment_name}'
     preds_file_path = f'{results_dir_path}/predictions.txt'
     # plot_losses_file_path = f'{results_dir_path}/plot_losses.txt'
 
-    context_results = {}
-    context_sizes = ['1 - 10', '11 - 20', '21 - 30', '30+']
-
-    for context_size in context_sizes:
-        context_results[context_size] = {
-            'n_total': 0,
-            'exact_match_total': 0,
-            'precision_total': 0,
-            'recall_total': 0,
-        }
-
-    edit_distance_total = 0
-    bleu_references = []
-    bleu_hypotheses = []
-
-    with open(preds_file_path) as preds_file:
-        lines = preds_file.readlines()
-
-        for i in range(0, len(lines), 3):
-            source = lines[i].rstrip()
-            target = lines[i + 1].rstrip()
-            pred = ' '.join(lines[i + 2].rstrip().replace("<EOS>", "").split())
-
-            context_size = get_context_size(source)
-            results = context_results[context_size]
-
-            results['n_total'] += 1
-
-            if target == pred:
-                results['exact_match_total'] += 1
-
-            target_tokens = target.split()
-            pred_tokens = pred.split()
-
-            results['precision_total'] += compute_precision(
-                target_tokens, pred_tokens)
-            results['recall_total'] += compute_recall(
-                target_tokens, pred_tokens)
-
-            edit_distance_total += compute_edit_distance(
-                ''.join(target_tokens), ''.join(pred_tokens))
-
-            bleu_references.append([target_tokens])
-            bleu_hypotheses.append(pred_tokens)
-
-    n_total = 0
-    exact_match_total = 0
-    precision_total = 0
-    recall_total = 0
-
-    context_precisions = []
-    context_recalls = []
-    context_f_scores = []
+    predictions = read_predictions(preds_file_path)
 
-    for context_size in context_results:
-        results = context_results[context_size]
+    if view_name:
+        buckets_file_path = get_buckets_file_path(
+            data_dir_path, view_name, split)
+        labels_dir_path = os.path.join(data_dir_path, BUCKET_LABELS_DIR_NAME)
 
-        n_total += results['n_total']
-        exact_match_total += results['exact_match_total']
-        precision_total += results['precision_total']
-        recall_total += results['recall_total']
-
-        precision = results['precision_total'] / results['n_total']
-        recall = results['recall_total'] / results['n_total']
-        f_score = compute_f_score(precision, recall)
-
-        context_precisions.append(precision)
-        context_recalls.append(recall)
-        context_f_scores.append(f_score)
-
-    plot_metrics_vs_context_size(
-        context_sizes, context_precisions, context_recalls, context_f_scores)
-
-    exact_match = exact_match_total / n_total
-    precision = precision_total / n_total
-    recall = recall_total / n_total
-    f_score = 2 * precision * recall / (precision + recall)
-    edit_distance = edit_distance_total / n_total
-    bleu = bleu_score.corpus_bleu(
-        bleu_references, bleu_hypotheses, weights=(0.5, 0.5))
-
-    print(f'Total test examples: {n_total}')
-    print(f'Exact match rate: {exact_match}')
-    print(f'Precision: {precision}')
-    print(f'Recall: {recall}')
-    print(f'F-Score: {f_score}')
-    print(f'Average edit distance: {edit_distance}')
-    print(f'BLEU score: {bleu}')
+        labels = [
+            read_bucket_labels(labels_dir_path, dimension)
+            for dimension in dimensions]
+        examples = (
+            (target, pred, bucket_ids)
+            for (_, target, pred), bucket_ids in pair_bucket_ids(
+                predictions, read_bucket_ids(buckets_file_path, dimensions)))
+    else:
+        if tuple(dimensions) != (CONTEXT_LENGTH_DIMENSION,):
+            raise ValueError(
+                'Only the context length dimension is available without a '
+                'view')
+
+        labels = [CONTEXT_LENGTH_LABELS]
+        # Subtract 3 punctuation tokens from the source
+        examples = (
+            (target, pred, (get_context_length_bucket(
+                len(source.split()) - 3),))
+            for source, target, pred in predictions)
+
+    totals, bucket_totals = compute_report(
+        examples, [len(dimension_labels) for dimension_labels in labels])
+
+    overall = summarize_totals(totals)
+
+    print(f'Total test examples: {totals[N_TOTAL]}')
+    print(f'Exact match rate: {overall["exact_match"]}')
+    print(f'Precision: {overall["precision"]}')
+    print(f'Recall: {overall["recall"]}')
+    print(f'F-Score: {overall["f_score"]}')
+    print(f'Average edit distance: {overall["edit_distance"]}')
+    print(f'BLEU score: {overall["bleu"]}')
+
+    for dimension, dimension_labels, dimension_totals in zip(
+            dimensions, labels, bucket_totals):
+        # Leave out the buckets without any predictions
+        rows = [
+            (label, summarize_totals(bucket_total))
+            for label, bucket_total in zip(dimension_labels, dimension_totals)
+            if bucket_total[N_TOTAL]]
+
+        print()
+        print(f'Metrics by {dimension}:')
+        for label, metrics in rows:
+            print(
+                f'{label}:',
+                f'n={metrics["n_total"]},',
+                f'exact match={metrics["exact_match"]:.4f},',
+                f'precision={metrics["precision"]:.4f},',
+                f'recall={metrics["recall"]:.4f},',
+                f'F-score={metrics["f_score"]:.4f},',
+                f'edit distance={metrics["edit_distance"]:.4f},',
+                f'BLEU={metrics["bleu"]:.4f}')
+
+        if plot_dir_path:
+            plot_file_path = os.path.join(plot_dir_path, f'{dimension}.png')
+            plot_metrics_by_bucket(dimension, rows, plot_file_path)
 
     # plot_losses = []
 
@@ -105,75 +106,229 @@ def main(experiment_name):
     #     for line in plot_losses_file.readlines():
     #         plot_losses.append(float(line))
 
-    # plot_training_losses(plot_losses)
-
-
-def compute_precision(target_tokens, pred_tokens):
-    if not pred_tokens:
-        return 1
-    count = 0
-    for pred_token in pred_tokens:
-        if pred_token in target_tokens:
-            count += 1
-    return count / len(pred_tokens)
+    # plot_training_losses(plot_losses, plot_losses_file_path + '.png')
 
 
-def compute_recall(target_tokens, pred_tokens):
-    if not target_tokens:
-        return 1
-    count = 0
-    for target_token in target_tokens:
-        if target_token in pred_tokens:
-            count += 1
-    return count / len(target_tokens)
+def read_predictions(preds_file_path):
+    """Reads the predictions of an experiment, three lines per prediction.
 
+    Args:
+        preds_file_path: Path to the predictions file
 
-def compute_f_score(precision, recall):
-    return 2 * precision * recall / (precision + recall)
+    Yields:
+        Tuples of the source, target and predicted name of each prediction
 
+    Raises:
+        ValueError: If the last prediction is missing its target or
+            predicted name
+    """
+    with open(preds_file_path) as preds_file:
+        for source in preds_file:
+            target = next(preds_file, None)
+            pred = next(preds_file, None)
+
+            if pred is None:
+                raise ValueError(
+                    f'The predictions file {preds_file_path} is truncated: '
+                    'its last prediction does not have all three lines')
+
+            yield (
+                source.rstrip(),
+                target.rstrip(),
+                ' '.join(pred.rstrip().replace("<EOS>", "").split()))
+
+
+def pair_bucket_ids(predictions, bucket_rows):
+    """Pairs each prediction with the bucket ids of its example, in order.
+
+    Args:
+        predictions: Iterable of predictions
+        bucket_rows: Iterable of the bucket ids of each example
+
+    Yields:
+        Tuples of each prediction and its bucket ids
+
+    Raises:
+        ValueError: If there are not as many predictions as bucket rows
+    """
+    missing = object()
+
+    for i, (prediction, bucket_ids) in enumerate(itertools.zip_longest(
+            predictions, bucket_rows, fillvalue=missing)):
+        if prediction is missing:
+            raise ValueError(
+                f'The bucket file has more rows than the {i} predictions, so '
+                'the predictions do not match the examples of the view split')
+        if bucket_ids is missing:
+            raise ValueError(
+                f'There are more predictions than the {i} rows of the bucket '
+                'file, so the predictions do not match the examples of the '
+                'view split')
+
+        yield prediction, bucket_ids
+
+
+def compute_report(examples, n_buckets):
+    """Computes the metric totals of examples in a single streaming pass.
+
+    Each distinct (target, predicted name) pair is given an id as the
+    examples stream by, and only the pair id and bucket ids of each example
+    are kept. The totals of each distinct pair are then computed once, by
+    compute_pair_totals, and added up over the examples of each bucket of
+    each dimension with weighted bincounts. Memory grows with the number of
+    distinct pairs and by one integer per example and dimension, so a
+    million predictions take tens of megabytes besides the distinct pairs.
+
+    Args:
+        examples: Iterable of tuples of the target name, predicted name and
+            bucket ids (one per dimension) of each example
+        n_buckets: Number of buckets of each dimension
+
+    Returns:
+        Tuple of the overall totals and the list of totals of each bucket of
+        each dimension
+    """
+    # Map each distinct (target, predicted name) pair to its id
+    pair_ids = {}
+    example_pair_ids = array('l')
+    # Bucket ids of every example, one example after the other
+    example_bucket_ids = array('l')
+
+    for target, pred, bucket_ids in examples:
+        example_pair_ids.append(
+            pair_ids.setdefault((target, pred), len(pair_ids)))
+        example_bucket_ids.extend(bucket_ids)
+
+    targets = [target for target, _ in pair_ids]
+    preds = [pred for _, pred in pair_ids]
+    pair_ids.clear()
+
+    pair_totals = compute_pair_totals(targets, preds)
+
+    example_pair_ids = np.asarray(example_pair_ids)
+    example_bucket_ids = np.asarray(example_bucket_ids).reshape(
+        len(example_pair_ids), len(n_buckets))
+
+    totals = np.bincount(
+        example_pair_ids, minlength=len(pair_totals)) @ pair_totals
+    bucket_totals = [np.zeros((n, N_TOTALS)) for n in n_buckets]
+
+    for i in range(N_TOTALS):
+        example_totals = pair_totals[example_pair_ids, i]
+
+        for dimension, dimension_totals in enumerate(bucket_totals):
+            dimension_totals[:, i] = np.bincount(
+                example_bucket_ids[:, dimension], weights=example_totals,
+                minlength=len(dimension_totals))
+
+    return (
+        to_total_list(totals),
+        [[to_total_list(bucket_total) for bucket_total in dimension_totals]
+         for dimension_totals in bucket_totals])
+
+
+def to_total_list(totals):
+    """Converts an array of totals to a list, with the counts as integers.
+
+    Args:
+        totals: Array of totals, in the order of the positions of the totals
+
+    Returns:
+        List of the totals
+    """
+    totals = totals.tolist()
+    for i in COUNT_TOTALS:
+        totals[i] = round(totals[i])
+    return totals
+
+
+def summarize_totals(totals):
+    """Averages the metric totals of a bucket.
+
+    Args:
+        totals: List of metric totals, as computed by compute_report
+
+    Returns:
+        Dictionary of the number of examples, the average metrics and the
+        corpus BLEU score
+
+    Raises:
+        ValueError: If there are no examples
+    """
+    n_total = totals[N_TOTAL]
+
+    if not n_total:
+        raise ValueError('There are no predictions to compute metrics over')
+    precision = totals[PRECISION_TOTAL] / n_total
+    recall = totals[RECALL_TOTAL] / n_total
+
+    return {
+        'n_total': n_total,
+        'exact_match': totals[EXACT_MATCH_TOTAL] / n_total,
+        'precision': precision,
+        'recall': recall,
+        'f_score': compute_f_score(precision, recall),
+        'edit_distance': totals[EDIT_DISTANCE_TOTAL] / n_total,
+        'bleu': compute_bleu(totals),
+    }
+
+
+def plot_metrics_by_bucket(dimension, rows, plot_file_path):
+    """Saves a plot of the precision, recall and F-score of each bucket.
+
+    Plots are rendered headless, so matplotlib and seaborn are only needed
+    when plotting.
+
+    Args:
+        dimension: Name of the bucket dimension
+        rows: List of tuples of the label and summarized metrics of each
+            bucket, of which only the largest MAX_PLOT_BUCKETS are drawn
+        plot_file_path: Path to save the plot to
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    if len(rows) > MAX_PLOT_BUCKETS:
+        rows = sorted(rows, key=lambda row: row[1]['n_total'], reverse=True)
+        rows = rows[:MAX_PLOT_BUCKETS]
 
-def compute_edit_distance(target, pred):
-    return distance.edit_distance(target, pred) / max(len(target), len(pred))
-
-
-def get_context_size(source):
-    # Subtract 3 punctuation tokens
-    size = len(source.split()) - 3
-
-    if size <= 10:
-        return '1 - 10'
-    elif size <= 20:
-        return '11 - 20'
-    elif size <= 30:
-        return '21 - 30'
-    else:
-        return '30+'
-
+    labels = [label for label, _ in rows]
+    precisions = [metrics['precision'] for _, metrics in rows]
+    recalls = [metrics['recall'] for _, metrics in rows]
+    f_scores = [metrics['f_score'] for _, metrics in rows]
 
-def plot_metrics_vs_context_size(
-        context_sizes, context_precisions, context_recalls, context_f_scores):
     plt.figure(figsize=(8, 5))
     sns.set_theme()
 
-    bar_x = context_sizes + context_sizes
-    bar_y = context_precisions + context_recalls
-    bar_hue = ['Precision'] * len(context_precisions) \
-        + ['Recall'] * len(context_recalls)
+    bar_x = labels + labels
+    bar_y = precisions + recalls
+    bar_hue = ['Precision'] * len(precisions) + ['Recall'] * len(recalls)
     sns.barplot(x=bar_x, y=bar_y, hue=bar_hue, palette=['red', 'orange'])
 
-    line_x = context_sizes
-    line_y = context_f_scores
-    line_hue = ['F-Score'] * len(context_f_scores)
+    line_x = labels
+    line_y = f_scores
+    line_hue = ['F-Score'] * len(f_scores)
     sns.lineplot(
         x=line_x, y=line_y, hue=line_hue, marker='o', palette=['blue'],
         linewidth=3)
 
-    plt.title('Metrics vs. Context Size', fontsize='x-large')
+    title = dimension.replace('_', ' ').title()
+    plt.title(f'Metrics vs. {title}', fontsize='x-large')
     plt.tight_layout()
-    plt.show()
 
+    os.makedirs(os.path.dirname(plot_file_path) or '.', exist_ok=True)
+    plt.savefig(plot_file_path)
+    plt.close()
+
+
+def plot_training_losses(plot_losses, plot_file_path):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-def plot_training_losses(plot_losses):
     plt.figure(figsize=(8, 5))
 
     sns.lineplot(x=range(len(plot_losses)), y=plot_losses)
@@ -182,9 +337,22 @@ def plot_training_losses(plot_losses):
     plt.ylabel('Negative Log Likelihood Loss', size='large')
     plt.title('Training Losses', size='x-large')
     plt.tight_layout()
-    plt.show()
+    plt.savefig(plot_file_path)
+    plt.close()
 
 
 if __name__ == '__main__':
-    experiment_name = sys.argv[1]
-    main(experiment_name)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('experiment_name')
+    parser.add_argument('--data-dir', default='../data')
+    parser.add_argument('--view')
+    parser.add_argument('--split', default='test')
+    parser.add_argument(
+        '--dimensions', nargs='+', choices=DIMENSIONS,
+        default=[CONTEXT_LENGTH_DIMENSION])
+    parser.add_argument('--plot-dir')
+    args = parser.parse_args()
+
+    main(
+        args.experiment_name, args.data_dir, args.view, args.split,
+        args.dimensions, args.plot_dir)
@@ -0,0 +1,118 @@
+import os
+from itertools import islice
+
+NAME = 'name'
+DOCUMENTATION = 'documentation'
+ENCLOSING_CLASSES = 'enclosing_classes'
+INPUT_PARAMETERS = 'input_parameters'
+RETURN_TYPE = 'return_type'
+BODY = 'body'
+CONTEXTS = (
+    DOCUMENTATION, ENCLOSING_CLASSES, INPUT_PARAMETERS, RETURN_TYPE, BODY)
+FIELDS = (NAME,) + CONTEXTS
+METHOD_NAME_95P = 5.0
+ALL_TOKENS_95P = 66.0
+
+# Maps the code2seq split directory names to the names of the dataset splits
+SPLITS = {
+    'training': 'train',
+    'validation': 'valid',
+    'test': 'test',
+}
+
+# Layout of the directory of a store and its views
+STORE_FILE_NAME = 'data.txt'
+META_FILE_NAME = 'meta.txt'
+VIEWS_DIR_NAME = 'views'
+CONTEXTS_FILE_NAME = 'contexts.txt'
+BUCKET_LABELS_DIR_NAME = 'bucket_labels'
+
+
+def get_index_file_path(output_dir_path, view_name, split):
+    """Gets the path to the index file of one split of a view.
+
+    Args:
+        output_dir_path: Path to the directory containing the store and views
+        view_name: Name of the view
+        split: Name of the dataset split (see SPLITS)
+
+    Returns:
+        Path to the index file as a string
+    """
+    return os.path.join(
+        output_dir_path, VIEWS_DIR_NAME, view_name, f'{split}.txt')
+
+
+def get_buckets_file_path(output_dir_path, view_name, split):
+    """Gets the path to the bucket file of one split of a view.
+
+    Args:
+        output_dir_path: Path to the directory containing the store and views
+        view_name: Name of the view
+        split: Name of the dataset split (see SPLITS)
+
+    Returns:
+        Path to the bucket file as a string
+    """
+    return os.path.join(
+        output_dir_path, VIEWS_DIR_NAME, view_name, f'{split}_buckets.txt')
+
+
+def read_view(output_dir_path, view_name, split):
+    """Reads the methods of one split of a view from the store.
+
+    The store is streamed once, skipping over the methods not in the index.
+
+    Args:
+        output_dir_path: Path to the directory containing the store and views
+        view_name: Name of the view
+        split: Name of the dataset split (see SPLITS)
+
+    Yields:
+        Dictionaries containing the name and view contexts of each method
+    """
+    store_file_path = os.path.join(output_dir_path, STORE_FILE_NAME)
+    view_dir_path = os.path.join(output_dir_path, VIEWS_DIR_NAME, view_name)
+    contexts_file_path = os.path.join(view_dir_path, CONTEXTS_FILE_NAME)
+    index_file_path = get_index_file_path(output_dir_path, view_name, split)
+
+    with open(contexts_file_path) as contexts_file:
+        contexts = contexts_file.read().split()
+
+    with open(index_file_path) as index_file, \
+            open(store_file_path) as store_file:
+        # Id of the method at the current position of the store file
+        store_method_id = 0
+
+        for line in index_file:
+            method_id = int(line)
+
+            # Skip the lines of the methods between the previous and this one
+            n_skipped_lines = (method_id - store_method_id) * len(FIELDS)
+            next(islice(store_file, n_skipped_lines, n_skipped_lines), None)
+
+            lines = [store_file.readline().rstrip('\n') for _ in FIELDS]
+            store_method_id = method_id + 1
+
+            method = dict(zip(FIELDS, lines))
+            yield {field: method[field] for field in [NAME] + contexts}
+
+
+def write_view_split(output_dir_path, view_name, split, output_file_path):
+    """Writes the methods of one split of a view to a text file.
+
+    The methods are written in the same six-line format as
+    parse_and_write_source_files, with an empty line for each context that
+    is not in the view.
+
+    Args:
+        output_dir_path: Path to the directory containing the store and views
+        view_name: Name of the view
+        split: Name of the dataset split (see SPLITS)
+        output_file_path: Path to the output file
+    """
+    with open(output_file_path, 'w') as output_file:
+        for method in read_view(output_dir_path, view_name, split):
+            for field in FIELDS:
+                output_file.write(method.get(field, ''))
+                output_file.write('\n')
@@ -0,0 +1,117 @@
+import random
+import numpy as np
+import pytest
+from metrics import *
+from results import compute_report, summarize_totals
+
+# Pairs of strings and their Levenshtein distance, as computed by nltk
+LEVENSHTEIN_CASES = [
+    ('kitten', 'sitting', 3),
+    ('getname', 'getvalue', 3),
+    ('', 'abc', 3),
+    ('abc', 'abc', 0),
+    ('flaw', 'lawn', 2),
+    ('tostring', 'string', 2),
+    ('a' * 70, 'b' + 'a' * 68, 2),
+]
+
+# Target and predicted names of a small corpus
+CORPUS = [
+    ('get name', 'get name'),
+    ('set value', 'get value'),
+    ('is empty', 'is not empty'),
+    ('to string', 'string'),
+    ('add all items', 'add item'),
+    ('remove', 'remove'),
+]
+
+# Metrics of CORPUS, with the BLEU score of nltk's corpus_bleu
+CORPUS_METRICS = {
+    'n_total': 6,
+    'exact_match': 0.3333333333333333,
+    'precision': 0.7777777777777777,
+    'recall': 0.7222222222222222,
+    'f_score': 0.7489711934156378,
+    'edit_distance': 0.1731060606060606,
+    'bleu': 0.29431901025930823,
+}
+
+
+def make_random_pairs(n_pairs, seed=0):
+    """Makes random pairs of names, including names too long for bulk."""
+    rng = random.Random(seed)
+    tokens = ['a', 'b', 'ab', 'ba', 'get', 'x']
+
+    def make_name(max_len):
+        return ' '.join(
+            rng.choice(tokens) for _ in range(rng.randint(0, max_len)))
+
+    pairs = [
+        ('', ''), ('a', ''), ('', 'a'), ('a b', 'a  b'), ('a a a', 'a'),
+        ('a b a b', 'b a b a'), ('x' * 64, 'x' * 63), ('x' * 64, 'y' * 64),
+        ('x' * 65, 'x'), (' '.join(['a'] * 17), 'a')]
+    for _ in range(n_pairs):
+        pairs.append((make_name(6), make_name(6)))
+    for _ in range(n_pairs // 10):
+        pairs.append((make_name(30), make_name(30)))
+    return pairs
+
+
+@pytest.mark.parametrize('a, b, distance', LEVENSHTEIN_CASES)
+def test_levenshtein(a, b, distance):
+    assert levenshtein(a, b) == distance
+    assert levenshtein(b, a) == distance
+
+
+def test_levenshtein_matches_nltk():
+    distance = pytest.importorskip('nltk.metrics.distance')
+    rng = random.Random(0)
+
+    for _ in range(2000):
+        a = ''.join(rng.choice('abc') for _ in range(rng.randint(0, 80)))
+        b = ''.join(rng.choice('abc') for _ in range(rng.randint(0, 80)))
+        assert levenshtein(a, b) == distance.edit_distance(a, b)
+
+
+def test_compute_pair_totals_matches_compute_example_totals():
+    pairs = make_random_pairs(5000)
+
+    pair_totals = compute_pair_totals(
+        [target for target, _ in pairs], [pred for _, pred in pairs])
+    example_totals = np.array(
+        [compute_example_totals(target, pred) for target, pred in pairs],
+        dtype=float)
+
+    np.testing.assert_array_equal(pair_totals, example_totals)
+
+
+def test_compute_report():
+    examples = [
+        (target, pred, (i % 2, i % 3)) for i, (target, pred)
+        in enumerate(CORPUS)]
+
+    totals, bucket_totals = compute_report(examples, [2, 3])
+
+    assert summarize_totals(totals) == pytest.approx(CORPUS_METRICS)
+    assert totals[N_TOTAL] == 6
+    for dimension_totals in bucket_totals:
+        n_totals = [bucket_total[N_TOTAL] for bucket_total in dimension_totals]
+        assert sum(n_totals) == totals[N_TOTAL]
+        assert np.allclose(np.sum(dimension_totals, axis=0), totals)
+
+
+def test_compute_bleu_matches_nltk():
+    bleu_score = pytest.importorskip('nltk.translate.bleu_score')
+    pairs = make_random_pairs(2000, seed=1)
+
+    totals, _ = compute_report(
+        ((target, pred, ()) for target, pred in pairs), [])
+
+    assert compute_bleu(totals) == pytest.approx(bleu_score.corpus_bleu(
+        [[target.split()] for target, _ in pairs],
+        [pred.split() for _, pred in pairs], weights=(0.5, 0.5)))
+
+
+def test_summarize_totals_without_examples():
+    with pytest.raises(ValueError):
+        summarize_totals([0] * N_TOTALS)
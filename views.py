@@ -0,0 +1,152 @@
+import os
+from buckets import *
+from store import *
+
+
+def make_ablation_views(contexts=CONTEXTS):
+    """Makes the context-combination views for a leave-one-out ablation.
+
+    Args:
+        contexts: Contexts to ablate
+
+    Returns:
+        Dictionary mapping view names to tuples of contexts, containing an
+        "all" view with every context and one "no_<context>" view for each
+        context with that context left out
+    """
+    views = {'all': tuple(contexts)}
+
+    for ablated_context in contexts:
+        views[f'no_{ablated_context}'] = tuple(
+            context for context in contexts if context != ablated_context)
+
+    return views
+
+
+def write_view_indexes(
+        output_dir_path, views, max_name_len=METHOD_NAME_95P,
+        max_context_len=ALL_TOKENS_95P, filter_per_view=False):
+    """Writes the index and bucket files of context-combination views.
+
+    Each view gets its own directory containing a file listing its contexts
+    and one index file per dataset split in SPLITS. An index file lists the
+    ids (line number in the metadata file) of the methods in the split whose
+    name and contexts are short enough, one id per line in ascending order.
+    Every split gets an index file, even if it has no methods.
+
+    By default, the total length of all CONTEXTS is filtered on, as in
+    parse_and_write_source_files, so every view holds the same methods in
+    each split and the metrics of the views can be compared. With
+    filter_per_view, only the length of each view's own contexts is filtered
+    on instead, so views without some contexts keep more methods.
+
+    Alongside each index file, a bucket file holds the precomputed bucket id
+    of each indexed method for every dimension in DIMENSIONS, in the same
+    order as the index. The context length of a method only counts the tokens
+    of the view contexts. The labels of the buckets are written to the
+    bucket labels directory of the store; the return type and project ids
+    are assigned over the whole metadata file, so they are shared by all
+    views.
+
+    Since everything is read from the metadata file, the store itself is
+    never read, so adding a view only costs writing its index files.
+
+    Args:
+        output_dir_path: Path to the directory containing the store and
+            metadata files written by parse_and_write_store
+        views: Dictionary mapping view names to sequences of contexts
+        max_name_len: Maximum number of tokens in the method name
+        max_context_len: Maximum total number of tokens in the contexts
+        filter_per_view: Whether to only count the tokens of the view
+            contexts against max_context_len
+    """
+    meta_file_path = os.path.join(output_dir_path, META_FILE_NAME)
+    views_dir_path = os.path.join(output_dir_path, VIEWS_DIR_NAME)
+
+    for view_name, contexts in views.items():
+        view_dir_path = os.path.join(views_dir_path, view_name)
+        os.makedirs(view_dir_path, exist_ok=True)
+
+        contexts_file_path = os.path.join(view_dir_path, CONTEXTS_FILE_NAME)
+        with open(contexts_file_path, 'w') as contexts_file:
+            contexts_file.write(' '.join(contexts))
+            contexts_file.write('\n')
+
+    # Map each return type and project to its bucket id
+    return_type_ids = {}
+    project_ids = {}
+
+    # Map each (view name, split) pair to its open index and bucket files
+    index_files = {}
+    buckets_files = {}
+
+    try:
+        # Open (and empty) the files of every split up front, so that splits
+        # without any methods still get their files
+        for view_name in views:
+            for split in SPLITS.values():
+                index_files[view_name, split] = open(
+                    get_index_file_path(output_dir_path, view_name, split),
+                    'w')
+                buckets_files[view_name, split] = open(
+                    get_buckets_file_path(output_dir_path, view_name, split),
+                    'w')
+                buckets_files[view_name, split].write(
+                    '\t'.join(DIMENSIONS) + '\n')
+
+        with open(meta_file_path) as meta_file:
+            for method_id, line in enumerate(meta_file):
+                split, project, return_type, name_len, *context_lens = \
+                    line.rstrip('\n').split('\t')
+
+                return_type_id = return_type_ids.setdefault(
+                    return_type, len(return_type_ids))
+                project_id = project_ids.setdefault(project, len(project_ids))
+
+                name_len = int(name_len)
+
+                # Skip the methods outside of the split directories
+                if split not in SPLITS.values() or name_len > max_name_len:
+                    continue
+
+                context_lens = dict(zip(CONTEXTS, map(int, context_lens)))
+
+                if not filter_per_view and \
+                        sum(context_lens.values()) > max_context_len:
+                    continue
+
+                for view_name, contexts in views.items():
+                    context_len = sum(
+                        context_lens[context] for context in contexts)
+
+                    if filter_per_view and context_len > max_context_len:
+                        continue
+
+                    index_files[view_name, split].write(f'{method_id}\n')
+
+                    context_length_id = get_context_length_bucket(
+                        context_len)
+                    name_length_id = get_name_length_bucket(name_len)
+
+                    bucket_ids = {
+                        CONTEXT_LENGTH_DIMENSION: context_length_id,
+                        NAME_LENGTH_DIMENSION: name_length_id,
+                        RETURN_TYPE_DIMENSION: return_type_id,
+                        PROJECT_DIMENSION: project_id,
+                    }
+                    buckets_files[view_name, split].write('\t'.join(
+                        str(bucket_ids[dimension])
+                        for dimension in DIMENSIONS))
+                    buckets_files[view_name, split].write('\n')
+    finally:
+        for open_file in [*index_files.values(), *buckets_files.values()]:
+            open_file.close()
+
+    labels_dir_path = os.path.join(output_dir_path, BUCKET_LABELS_DIR_NAME)
+    write_bucket_labels(
+        labels_dir_path, CONTEXT_LENGTH_DIMENSION, CONTEXT_LENGTH_LABELS)
+    write_bucket_labels(
+        labels_dir_path, NAME_LENGTH_DIMENSION, NAME_LENGTH_LABELS)
+    write_bucket_labels(
+        labels_dir_path, RETURN_TYPE_DIMENSION, list(return_type_ids))
+    write_bucket_labels(labels_dir_path, PROJECT_DIMENSION, list(project_ids))